@@ -36,7 +36,7 @@ except ImportError:
 # Importações para sistema de monitoramento
 try:
     from firebase_config import firebase_manager
-    from ip_utils import get_client_info
+    from ip_utils import get_client_info, prefetch_client_ip
     from admin_page import tela_admin, dashboard_admin, relatorio_completo, estatisticas_usuario
     MONITORING_AVAILABLE = True
     
@@ -2129,6 +2129,9 @@ if 'login_time' not in st.session_state:
     st.session_state.login_time = None
 if 'sessao_expirada' not in st.session_state:
     st.session_state.sessao_expirada = False
+# Detectar IP em segundo plano (usado no registro de acessos)
+if MONITORING_AVAILABLE:
+    prefetch_client_ip()
 # Verificar se deve mostrar tela de instruções
 if st.session_state.mostrar_instrucoes:
     tela_instrucoes()
@@ -1,36 +1,96 @@
 """
 Utilitários para obter informações de IP e navegador do usuário
 """
+import os
+import socket
 import streamlit as st
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
-def get_client_ip() -> str:
-    """Obtém o IP do cliente através do Streamlit"""
+# Sessão HTTP compartilhada (keep-alive) para evitar novo handshake TCP/TLS a cada chamada.
+# Sem retentativas: a consulta é única e pode bloquear o login
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=0)
+_SESSION.mount('http://', _ADAPTER)
+_SESSION.mount('https://', _ADAPTER)
+_SESSION.headers.update({'Connection': 'keep-alive', 'Accept': 'application/json'})
+
+# Timeout (conexão, leitura) da consulta de IP; pior caso ~5s, como a versão original
+_PROBE_TIMEOUT = (1, 4)
+
+# Executor compartilhado para consultas em segundo plano. A espera pelo resultado
+# cobre o pior caso da consulta (sum(_PROBE_TIMEOUT)) com folga, para não
+# abandonar uma tarefa ainda em execução ocupando um worker
+_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+_PREFETCH_WAIT = sum(_PROBE_TIMEOUT) + 1
+
+def _use_remote_ip_probe() -> bool:
+    """Indica se a consulta de IP público (httpbin) está habilitada (variável USE_REMOTE_IP_PROBE)"""
+    return (os.getenv('USE_REMOTE_IP_PROBE') or '').strip().lower() in ('1', 'true', 'sim', 'yes')
+
+def _local_ip() -> str:
+    """Obtém o IP local via socket UDP (connect não envia pacotes pela rede)"""
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     try:
-        # Streamlit não expõe diretamente o IP, então usamos serviços externos
-        # como fallback para desenvolvimento
+        s.connect(('8.8.8.8', 80))
+        return s.getsockname()[0]
+    finally:
+        s.close()
+
+def _fetch_client_ip(use_remote_probe: bool = False) -> str:
+    """Consulta o IP do cliente (sem cache)"""
+    # Streamlit não expõe diretamente o IP. Em produção, o IP público
+    # do servidor pode ser obtido por um serviço externo, se habilitado
+    if use_remote_probe:
         try:
-            # Tenta obter IP local primeiro (para desenvolvimento)
-            response = requests.get('https://httpbin.org/ip', timeout=5)
+            response = _SESSION.get('https://httpbin.org/ip', timeout=_PROBE_TIMEOUT)
             if response.status_code == 200:
                 return response.json().get('origin', '127.0.0.1')
-        except:
+        except (requests.RequestException, ValueError):
             pass
-        
-        # Fallback para IP local
+    
+    # Fallback para IP local (desenvolvimento), sem ida à Internet
+    try:
+        return _local_ip()
+    except OSError:
         return '127.0.0.1'
-    except Exception:
-        return 'Unknown'
+
+def get_client_ip() -> str:
+    """Obtém o IP do cliente através do Streamlit (memorizado na sessão)"""
+    ip = st.session_state.get('_cached_client_ip')
+    if ip is None:
+        future = st.session_state.pop('client_ip_future', None)
+        if future is not None:
+            # Consulta já iniciada por prefetch_client_ip()
+            try:
+                ip = future.result(timeout=_PREFETCH_WAIT)
+            except Exception:
+                ip = 'Unknown'
+        else:
+            ip = _fetch_client_ip(_use_remote_ip_probe())
+        # Não memoriza falhas para que a próxima chamada tente novamente
+        if ip != 'Unknown':
+            st.session_state['_cached_client_ip'] = ip
+    return ip
+
+def prefetch_client_ip() -> None:
+    """Inicia a detecção do IP em segundo plano para não bloquear a renderização"""
+    if '_cached_client_ip' not in st.session_state and 'client_ip_future' not in st.session_state:
+        st.session_state['client_ip_future'] = _EXECUTOR.submit(_fetch_client_ip, _use_remote_ip_probe())
+
+# Valor estático durante a vida do processo; calculado uma única vez
+try:
+    _USER_AGENT = "Streamlit App" if st.get_option("browser.gatherUsageStats") else "Unknown Browser"
+except Exception:
+    _USER_AGENT = "Unknown Browser"
 
 def get_user_agent() -> str:
     """Obtém informações do navegador do usuário"""
-    try:
-        # Streamlit não expõe user-agent diretamente
-        # Para uma implementação mais robusta, seria necessário
-        # usar headers HTTP customizados
-        return st.get_option("browser.gatherUsageStats") and "Streamlit App" or "Unknown Browser"
-    except Exception:
-        return "Unknown Browser"
+    # Streamlit não expõe user-agent diretamente
+    # Para uma implementação mais robusta, seria necessário
+    # usar headers HTTP customizados
+    return _USER_AGENT
 
 def get_client_info() -> dict:
     """Obtém informações completas do cliente"""